@@ -0,0 +1,100 @@
+import asyncio
+from collections import deque
+
+
+class AdmissionController:
+    """
+    Caps concurrent analyses and in-flight image bytes, with a short bounded
+    wait queue. acquire() returns None when admitted, otherwise the HTTP
+    status to shed the request with (429 queue full, 503 wait timed out).
+    """
+
+    def __init__(self, max_active, max_bytes, max_queued, queue_timeout):
+        self.max_active = max_active
+        self.max_bytes = max_bytes
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.inflight_bytes = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._cond = asyncio.Condition()
+        # FIFO of waiting requests; only the head may be admitted
+        self._waiters = deque()
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _budget(self, nbytes):
+        # A single request never needs more than the whole pool.
+        return min(nbytes, self.max_bytes)
+
+    def _has_room(self, nbytes):
+        return (
+            self.active < self.max_active
+            and self.inflight_bytes + nbytes <= self.max_bytes
+        )
+
+    async def acquire(self, nbytes):
+        nbytes = self._budget(nbytes)
+        async with self._cond:
+            if self.queued == 0 and self._has_room(nbytes):
+                self.active += 1
+                self.inflight_bytes += nbytes
+                return None
+
+            if self.queued >= self.max_queued:
+                self.rejected += 1
+                return 429
+
+            ticket = object()
+            self._waiters.append(ticket)
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(
+                        lambda: self._waiters[0] is ticket and self._has_room(nbytes)
+                    ),
+                    self.queue_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                return 503
+            finally:
+                # Admitted or timed out, the next waiter may now be at the head
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+            self.active += 1
+            self.inflight_bytes += nbytes
+            return None
+
+    async def shrink(self, old_nbytes, new_nbytes):
+        """
+        Lower a held reservation once the real image sizes are known.
+        """
+        released = self._budget(old_nbytes) - self._budget(new_nbytes)
+        if released <= 0:
+            return
+        async with self._cond:
+            self.inflight_bytes -= released
+            self._cond.notify_all()
+
+    async def release(self, nbytes):
+        nbytes = self._budget(nbytes)
+        async with self._cond:
+            self.active -= 1
+            self.inflight_bytes -= nbytes
+            self._cond.notify_all()
+
+    def snapshot(self):
+        return {
+            "active_analyses": self.active,
+            "max_concurrent_analyses": self.max_active,
+            "queued_analyses": self.queued,
+            "max_queued_analyses": self.max_queued,
+            "inflight_image_bytes": self.inflight_bytes,
+            "max_inflight_image_bytes": self.max_bytes,
+            "rejected_total": self.rejected,
+            "timed_out_total": self.timed_out,
+        }
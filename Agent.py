@@ -9,6 +9,7 @@ from google.cloud import vision
 import re
 import time
 import psycopg2
+from Registry import Provider, ProviderRegistry
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
@@ -32,6 +33,43 @@ genai.configure(api_key=os.getenv("GEMINI_API"))
 
 model = genai.GenerativeModel("gemini-2.5-flash")
 
+# Attribute groups and the value hints used when prompting for them.
+ATTRIBUTE_GROUPS = {
+    "semantic": {
+        "category": "string",
+        "brand": "string",
+        "material": "short descriptive phrase",
+        "condition": "new | like_new | good | fair | poor",
+        "style": "short descriptive phrase",
+        "gender": "male | female | unisex | kids",
+        "season": "short descriptive phrase",
+        "pattern": "short descriptive phrase",
+        "fit": "slim | regular | loose | oversized | other",
+    },
+    "color": {
+        "color": "red | green | blue | yellow | white | black",
+    },
+    "construction": {
+        "sleeve_length": "short sleeve | long sleeve | sleeveless | half sleeve",
+        "neckline": "crew neck | v-neck | collared | round neck | polo | other",
+        "closure_type": "buttons | zipper | laces | slip-on | none",
+    },
+}
+
+# Order of attributes in the combined response
+ATTRIBUTE_ORDER = [
+    "category", "brand", "color", "material", "condition", "style", "gender",
+    "season", "pattern", "sleeve_length", "neckline", "closure_type", "fit",
+]
+
+ALL_ATTRIBUTES = [attr for spec in ATTRIBUTE_GROUPS.values() for attr in spec]
+
+registry = ProviderRegistry(
+    explore_rate=float(os.getenv("ROUTER_EXPLORE_RATE", "0.05")),
+    error_threshold=float(os.getenv("ROUTER_ERROR_THRESHOLD", "0.5")),
+    error_half_life=float(os.getenv("ROUTER_ERROR_HALF_LIFE_S", "60")),
+)
+
 def normalize_url(url):
     logging.info(f"Normalizing URL: {url}")
     parsed = urlparse(url.strip())
@@ -70,10 +108,11 @@ def image_search(urls):
 
 import requests
 
-def validate_images_under_10mb(urls: list[str]) -> bool:
+def validate_images_under_10mb(urls: list[str], sizes=None) -> bool:
     """
     Check if all images in the list are under 10 MB.
     Returns True if all are valid, False if any exceeds 10MB or is invalid.
+    If `sizes` is given, the downloaded byte count of each image is appended to it.
     """
     for url in urls:
         try:
@@ -93,6 +132,8 @@ def validate_images_under_10mb(urls: list[str]) -> bool:
                     downloaded += len(chunk)
                     if downloaded > 10 * 1024 * 1024:
                         return False  # too large
+            if sizes is not None:
+                sizes.append(downloaded)
 
         except Exception:
             return False  # failed to fetch or invalid URL
@@ -132,6 +173,14 @@ def safe_parse_json(text: str) -> dict:
         logging.debug(f"Raw text was: {text}")
         return {}
 
+def attributes_json_template(attributes: list[str]) -> str:
+    """
+    Build the JSON skeleton shown to the LLMs for the requested attributes.
+    """
+    hints = {attr: hint for spec in ATTRIBUTE_GROUPS.values() for attr, hint in spec.items()}
+    lines = [f'      "{attr}": "{hints.get(attr, "string")}"' for attr in attributes]
+    return "    {\n" + ",\n".join(lines) + "\n    }"
+
 def rgb_to_basic_color(r, g, b):
     if r > 150 and g < 100 and b < 100:
         return "red"
@@ -190,24 +239,18 @@ def vision_cloud_for_color(image_parts):
 # print(result)
 
 
-def metallama_model(splited_urls: str):
+def metallama_model(splited_urls: str, attributes=None):
     start = time.time()
+    attributes = attributes or list(ATTRIBUTE_GROUPS["construction"])
     try:
 
-        prompt = """
+        prompt = f"""
         You are an expert fashion classifier.
         Look at all 4 photos of the SAME clothing item.
-        Extract ONLY these attributes:
-        - Sleeve Length (short sleeve, long sleeve, sleeveless, half sleeve)
-        - Neckline (crew neck, v-neck, collared, round neck, polo, etc.)
-        - Closure Type (buttons, zipper, laces, slip-on, none)
-
-        Respond ONLY in JSON like this:
-        {
-          "sleeve_length": "...",
-          "neckline": "...",
-          "closure_type": "..."
-        }
+        Extract ONLY these attributes and respond ONLY in JSON like this:
+{attributes_json_template(attributes)}
+
+        If an attribute is not visible, set it to "unknown".
         """
 
         input_content = [
@@ -236,26 +279,17 @@ def metallama_model(splited_urls: str):
         logging.exception("Error in metallama_model")
         raise
 
-def vision_model(image_parts):
+def vision_model(image_parts, attributes=None):
     logging.info("Running vision model")
     start = time.time()
+    attributes = attributes or list(ATTRIBUTE_GROUPS["semantic"])
 
-    prompt = """
+    prompt = f"""
     You are a fashion attribute extractor.
     Look at ALL 4 photos of the same clothing item together.
     Return ONLY a valid JSON object with the following attributes:
 
-    {
-      "category": "string ",
-      "brand": "string ",
-      "material": "short descriptive phrase ",
-      "condition": "new | like_new | good | fair | poor",
-      "style": "short descriptive phrase",
-      "gender": "male | female | unisex | kids",
-      "season": "short descriptive phrase ",
-      "pattern": "short descriptive phrase",
-      "fit": "slim | regular | loose | oversized | other"
-    }
+{attributes_json_template(attributes)}
 
     Rules:
     - Use evidence from ALL images before deciding.
@@ -269,118 +303,104 @@ def vision_model(image_parts):
     return {"attributes": response.text, "model_used": "Gemini 2.5 Flash" , "time" : round((end - start) * 1000, 2)}
 
 
-def orchestrator(urls_str: str , id) -> dict:
-    results = {}
+def run_gemini(attributes, request):
+    gemini_result = vision_model(request["image_parts"], attributes)
+    if isinstance(gemini_result.get("attributes"), str):
+        return safe_parse_json(gemini_result["attributes"])
+    return gemini_result.get("attributes") or {}
+
+def run_cloud(attributes, request):
+    result = vision_cloud_for_color(image_parts=request["image_parts"])
+    return {"color": result["color"]}
+
+def run_llama(attributes, request):
+    return metallama_model(request["urls"], attributes)["attributes"]
+
+registry.register(Provider(
+    name="gemini",
+    model="gemini-2.5-flash",
+    attributes=ALL_ATTRIBUTES,
+    run=run_gemini,
+    primary_for=["semantic"],
+))
+registry.register(Provider(
+    name="cloud",
+    model="Google Cloud Vision",
+    attributes=["color"],
+    run=run_cloud,
+    primary_for=["color"],
+))
+registry.register(Provider(
+    name="llama",
+    model="meta-llama/llama-4-scout-17b-16e-instruct",
+    attributes=ALL_ATTRIBUTES,
+    run=run_llama,
+    primary_for=["construction"],
+))
+
+
+def orchestrator(urls_str: str , id, on_image_sizes=None) -> dict:
+    """
+    `on_image_sizes`, if given, is called with the total validated image bytes
+    before the images are decoded (used by admission control).
+    """
+    routed = {}
     threads = []
-    timings = {}
-    gemin_time = {"time": 0}
-    llama_time = {"time": 0}
-    cloud_time = {"time": 0}
+    sizes = []
 
     urls = split_urls(urls_str)
 
-    if validate_images_under_10mb(urls):
+    if validate_images_under_10mb(urls, sizes):
+        if on_image_sizes is not None:
+            on_image_sizes(sum(sizes))
         image_parts = image_search(urls)
-
-        def run_cloud():
-            try:
-                results["cloud"] = vision_cloud_for_color(image_parts=image_parts)
-                cloud_time["time"] = results["cloud"].get("time", 0)
-            except Exception:
-                logging.exception("Cloud Vision failed")
-                results["cloud"] = {"color": "unknown", "model_used": "Cloud Vision"}
-                cloud_time["time"] = 0
-
-        def run_gemini():
-            nonlocal gemin_time
-            try:
-                gemini_result = vision_model(image_parts)
-
-                if isinstance(gemini_result, dict):
-                    if "attributes" in gemini_result and isinstance(gemini_result["attributes"], str):
-                        results["gemini"] = safe_parse_json(gemini_result["attributes"])
-                        gemin_time["time"] = gemini_result.get("time", 0)
-                    else:
-                        results["gemini"] = gemini_result
-                        gemin_time["time"] = gemini_result.get("time", 0)
-                elif isinstance(gemini_result, str):
-                    results["gemini"] = safe_parse_json(gemini_result)
-                    gemin_time["time"] = 0
-                else:
-                    results["gemini"] = {}
-                    gemin_time["time"] = 0
-
-                logging.info(f"Gemini parsed attributes (final): {results['gemini']}")
-            except Exception:
-                logging.exception("Gemini failed")
-                results["gemini"] = {}
-                gemin_time["time"] = 0
-
-        def run_llama():
-            nonlocal llama_time
-            try:
-                result1 = metallama_model(urls)
-                results["llama"] = result1["attributes"]
-                llama_time["time"] = result1.get("time", 0)
-            except Exception:
-                logging.exception("LLaMA failed")
-                results["llama"] = {}
-                llama_time["time"] = 0
-
-        t1 = threading.Thread(target=run_cloud)
-        t2 = threading.Thread(target=run_gemini)
-        t3 = threading.Thread(target=run_llama)
-
-        for t in [t1, t2, t3]:
-            t.start()
-        for t in [t1, t2, t3]:
-            t.join()
-
-        combined = {
-            "category": results["gemini"].get("category", "unknown"),
-            "brand": results["gemini"].get("brand", "unknown"),
-            "color": results["cloud"].get("color", "unknown"),
-            "material": results["gemini"].get("material", "unknown"),
-            "condition": results["gemini"].get("condition", "unknown"),
-            "style": results["gemini"].get("style", "unknown"),
-            "gender": results["gemini"].get("gender", "unknown"),
-            "season": results["gemini"].get("season", "unknown"),
-            "pattern": results["gemini"].get("pattern", "unknown"),
-            "sleeve_length": results["llama"].get("sleeve_length", "unknown"),
-            "neckline": results["llama"].get("neckline", "unknown"),
-            "closure_type": results["llama"].get("closure_type", "unknown"),
-            "fit": results["gemini"].get("fit", "unknown"),
-        }
-
-        model_info = {
-            "gemini": {
-                "model": "gemini-2.5-flash",
-                "latency_ms": gemin_time["time"],
-                "attributes": ["category","brand","material","condition","style","gender","season","pattern","fit"]
-            },
-            "cloud": {
-                "model": "Google Cloud Vision",
-                "latency_ms": cloud_time["time"],
-                "attributes": ["color"]
-            },
-            "llama": {
-                "model": "meta-llama/llama-4-scout-17b-16e-instruct",
-                "latency_ms": llama_time["time"],
-                "attributes": ["sleeve_length","neckline","closure_type"]
-            },
-        }
-
-        total_time = round(
-            gemin_time["time"] + cloud_time["time"] + llama_time["time"], 2
-        )
+        request = {"urls": urls, "image_parts": image_parts}
+
+        def run_group(group, attributes):
+            routed[group] = registry.route(group, attributes, request)
+
+        for group, spec in ATTRIBUTE_GROUPS.items():
+            thread = threading.Thread(target=run_group, args=(group, list(spec)))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        results = {}
+        model_info = {}
+        total_time = 0
+        for group, (provider, attributes, attempts) in routed.items():
+            for attr in ATTRIBUTE_GROUPS[group]:
+                results[attr] = attributes.get(attr, "unknown")
+            # Failed attempts before a fallback only count toward the total
+            total_time += sum(attempt["latency_ms"] for attempt in attempts)
+
+            # Every provider failed; the group is reported as unserved
+            if provider is None:
+                continue
+
+            # A provider may serve several groups; merge them under its name
+            info = model_info.setdefault(provider.name, {
+                "model": provider.model,
+                "latency_ms": 0,
+                "attributes": [],
+            })
+            info["latency_ms"] = round(info["latency_ms"] + attempts[-1]["latency_ms"], 2)
+            info["attributes"].extend(ATTRIBUTE_GROUPS[group])
+
+        combined = {attr: results.get(attr, "unknown") for attr in ATTRIBUTE_ORDER}
+
+        total_time = round(total_time, 2)
         processing = {
             "status": "200 Success",
             "total_latency_ms": total_time,
             "per_model_latency": {
-                "gemini": gemin_time["time"],
-                "cloud": cloud_time["time"],
-                "llama": llama_time["time"]
-            }
+                name: info["latency_ms"] for name, info in model_info.items()
+            },
+            "routing": {
+                group: routed[group][0].name if routed[group][0] else None
+                for group in ATTRIBUTE_GROUPS
+            },
         }
         ids = str(id)
         cursor = con.cursor()
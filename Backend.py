@@ -1,10 +1,13 @@
 from fastapi import FastAPI
 from fastapi.responses import StreamingResponse, Response , JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import psycopg2
 from dotenv import load_dotenv
-from Agent import orchestrator
+from Agent import orchestrator, registry
+from Admission import AdmissionController
+from anyio import from_thread
 from uuid import uuid1
 import time
 import json
@@ -12,6 +15,26 @@ import os
 
 load_dotenv()
 
+# Admission control limits. Each analysis holds up to 4 decoded images plus
+# their JPEG buffers. A request is admitted with the worst-case reservation
+# (4 images of 10MB times IMAGE_MEMORY_FACTOR) and shrinks it to the measured
+# size once validation has fetched the images.
+MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", "4"))
+MAX_QUEUED_ANALYSES = int(os.getenv("MAX_QUEUED_ANALYSES", "8"))
+MAX_INFLIGHT_IMAGE_MB = int(os.getenv("MAX_INFLIGHT_IMAGE_MB", "1024"))
+IMAGE_MEMORY_FACTOR = int(os.getenv("IMAGE_MEMORY_FACTOR", "10"))
+WORST_CASE_REQUEST_BYTES = 4 * 10 * 1024 * 1024 * IMAGE_MEMORY_FACTOR
+ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+RETRY_AFTER_S = int(os.getenv("RETRY_AFTER_S", "5"))
+
+
+admission = AdmissionController(
+    max_active=MAX_CONCURRENT_ANALYSES,
+    max_bytes=MAX_INFLIGHT_IMAGE_MB * 1024 * 1024,
+    max_queued=MAX_QUEUED_ANALYSES,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT_S,
+)
+
 class ChatRequest(BaseModel):
     query : str
 
@@ -32,9 +55,29 @@ async def analyze_item(request: ChatRequest):
     query = request.query
     session_id = uuid1()
 
-    response = orchestrator(query,session_id)
+    # No network I/O before admission so shed requests are rejected immediately
+    reservation = {"bytes": WORST_CASE_REQUEST_BYTES}
+    shed_status = await admission.acquire(reservation["bytes"])
+    if shed_status is not None:
+        reason = "Too many queued analyses" if shed_status == 429 else "Server busy, analysis queue timed out"
+        return JSONResponse(
+            {"status": shed_status, "id": str(session_id), "error": f"{reason}. Retry later."},
+            status_code=shed_status,
+            headers={"Retry-After": str(RETRY_AFTER_S)},
+        )
+
+    def shrink_reservation(image_bytes):
+        # Called from the orchestrator's worker thread after validation
+        new_bytes = min(image_bytes * IMAGE_MEMORY_FACTOR, reservation["bytes"])
+        from_thread.run(admission.shrink, reservation["bytes"], new_bytes)
+        reservation["bytes"] = new_bytes
+
+    try:
+        # orchestrator blocks on downloads and model calls; keep it off the event loop
+        response = await run_in_threadpool(orchestrator, query, session_id, shrink_reservation)
+    finally:
+        await admission.release(reservation["bytes"])
 
-   
     return JSONResponse(response)
 
 @app.get("/v1/status")
@@ -42,7 +85,9 @@ async def get_status():
     return {
         "status": "ok",
         "message": "API is running smoothly",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "admission": admission.snapshot(),
+        "routing": registry.snapshot()
     }
 
         
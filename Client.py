@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import httpx
+
+RETRY_STATUSES = {429, 503}
+
+
+class AnalyzeError(Exception):
+    """
+    Raised when the analyze API returns a non-success response.
+    """
+
+    def __init__(self, status_code, message):
+        super().__init__(f"{status_code} - {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class AnalysisFailed(AnalyzeError):
+    """
+    Raised when the request succeeded but the orchestrator reported a failure
+    in the body, e.g. invalid or oversized images.
+    """
+
+
+def build_payload(urls) -> dict:
+    """
+    Accept either the raw URL text or a list of URLs.
+    """
+    if isinstance(urls, str):
+        return {"query": urls.strip()}
+    return {"query": "\n".join(u.strip() for u in urls)}
+
+
+def parse_response(response: httpx.Response) -> dict:
+    if response.status_code != 200:
+        raise AnalyzeError(response.status_code, response.text)
+    result = response.json()
+    # orchestrator reports validation errors inside the body
+    if result.get("status") not in (None, 200):
+        raise AnalysisFailed(result["status"], result.get("error", "Unknown error"))
+    return result
+
+
+def retry_delay(response, attempt, backoff_base, backoff_max) -> float:
+    """
+    Honour Retry-After when the server sends it, otherwise exponential backoff.
+    Jitter is added either way so clients shed in the same burst don't retry together.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+                return min(delay + random.uniform(0, delay / 2), backoff_max)
+            except ValueError:
+                pass
+    delay = backoff_base * (2 ** attempt)
+    return min(delay + random.uniform(0, delay / 2), backoff_max)
+
+
+class AnalyzeClient:
+    """
+    Blocking client for the analyze API. Keeps a pool of keep-alive connections
+    and runs batches on a thread pool bounded by max_concurrency.
+    """
+
+    def __init__(self, base_url, timeout=60, max_concurrency=4, max_retries=3,
+                 backoff_base=0.5, backoff_max=30):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._http = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+
+    def _post(self, payload):
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self._http.post("/v1/items/analyze", json=payload)
+                if response.status_code not in RETRY_STATUSES:
+                    return parse_response(response)
+            except httpx.ConnectError:
+                if attempt >= self.max_retries:
+                    raise
+            if attempt >= self.max_retries:
+                return parse_response(response)
+
+            delay = retry_delay(response, attempt, self.backoff_base, self.backoff_max)
+            logging.info(f"Analyze API busy, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def analyze(self, urls) -> dict:
+        return self._post(build_payload(urls))
+
+    def analyze_many(self, items):
+        """
+        Submit items concurrently and yield (index, result) as each one finishes.
+        A failed item yields its exception in place of the result.
+        """
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            futures = {pool.submit(self.analyze, item): i for i, item in enumerate(items)}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+        finally:
+            # Don't run queued items if the caller stops consuming early
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def status(self, timeout=5) -> dict:
+        response = self._http.get("/v1/status", timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncAnalyzeClient:
+    """
+    asyncio variant of AnalyzeClient; concurrency is bounded by a semaphore.
+    """
+
+    def __init__(self, base_url, timeout=60, max_concurrency=4, max_retries=3,
+                 backoff_base=0.5, backoff_max=30):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+
+    async def _post(self, payload):
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._semaphore:
+                    response = await self._http.post("/v1/items/analyze", json=payload)
+                if response.status_code not in RETRY_STATUSES:
+                    return parse_response(response)
+            except httpx.ConnectError:
+                if attempt >= self.max_retries:
+                    raise
+            if attempt >= self.max_retries:
+                return parse_response(response)
+
+            # Back off outside the semaphore so waiting items don't hold a slot
+            delay = retry_delay(response, attempt, self.backoff_base, self.backoff_max)
+            logging.info(f"Analyze API busy, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def analyze(self, urls) -> dict:
+        return await self._post(build_payload(urls))
+
+    async def analyze_many(self, items):
+        """
+        Async generator yielding (index, result) as each item finishes.
+        A failed item yields its exception in place of the result.
+        """
+        async def run(i, item):
+            try:
+                return i, await self.analyze(item)
+            except Exception as e:
+                return i, e
+
+        tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def status(self, timeout=5) -> dict:
+        response = await self._http.get("/v1/status", timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,210 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ProviderStats:
+    """
+    Rolling latency and error statistics for one provider on one attribute group.
+    p95 is taken over a window of recent calls and smoothed with an EWMA; the
+    error rate is an EWMA of the failure indicator that decays with a half-life
+    so a failed provider becomes eligible again.
+    """
+
+    def __init__(self, window=50, alpha=0.3, error_half_life=60):
+        self.samples = deque(maxlen=window)
+        self.alpha = alpha
+        self.error_half_life = error_half_life
+        self.p95_ewma = None
+        self.error_ewma = 0.0
+        self.error_updated = time.time()
+        self.last_failed = False
+        self.calls = 0
+        self.failures = 0
+
+    def error_rate(self, now=None):
+        now = time.time() if now is None else now
+        elapsed = max(0.0, now - self.error_updated)
+        return self.error_ewma * 0.5 ** (elapsed / self.error_half_life)
+
+    def _record(self, latency_ms, failed):
+        self.calls += 1
+        self.samples.append(latency_ms)
+        p95 = percentile(self.samples, 95)
+        if self.p95_ewma is None:
+            self.p95_ewma = p95
+        else:
+            self.p95_ewma = self.alpha * p95 + (1 - self.alpha) * self.p95_ewma
+
+        now = time.time()
+        self.error_ewma = self.alpha * failed + (1 - self.alpha) * self.error_rate(now)
+        self.error_updated = now
+
+    def record_success(self, latency_ms):
+        self.last_failed = False
+        self._record(latency_ms, 0)
+
+    def record_failure(self, latency_ms, floor_ms=0):
+        """
+        Count the time spent, but never let a fast failure make a provider look
+        faster: the sample is at least its own p95, or `floor_ms` (the slowest
+        known p95 in the group) when it has no samples yet.
+        """
+        self.failures += 1
+        self.last_failed = True
+        self._record(max(latency_ms, self.p95_ewma or 0, floor_ms), 1)
+
+    def cooling_down(self, now=None):
+        # The latest call failed and the failure hasn't decayed for a half-life yet
+        now = time.time() if now is None else now
+        return self.last_failed and now - self.error_updated < self.error_half_life
+
+    def snapshot(self):
+        return {
+            "p95_ewma_ms": round(self.p95_ewma, 2) if self.p95_ewma is not None else None,
+            "error_rate_ewma": round(self.error_rate(), 3),
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class Provider:
+    """
+    A model backend. `attributes` lists every attribute it can produce and
+    `run(attributes, request)` returns a dict with those attributes.
+    `primary_for` names the groups it should serve before any stats exist.
+    """
+
+    def __init__(self, name, model, attributes, run, primary_for=()):
+        self.name = name
+        self.model = model
+        self.attributes = set(attributes)
+        self.run = run
+        self.primary_for = set(primary_for)
+
+    def can_serve(self, attributes):
+        return set(attributes) <= self.attributes
+
+
+class ProviderRegistry:
+    """
+    Routes each attribute group to the healthiest, fastest provider that can
+    produce it, falling back to the next-best provider when a call fails.
+    """
+
+    def __init__(self, explore_rate=0.05, error_threshold=0.5, window=50, alpha=0.3,
+                 error_half_life=60):
+        self.explore_rate = explore_rate
+        self.error_threshold = error_threshold
+        self.error_half_life = error_half_life
+        self.window = window
+        self.alpha = alpha
+        self._providers = []
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, provider):
+        if any(p.name == provider.name for p in self._providers):
+            raise ValueError(f"Provider already registered: {provider.name}")
+        self._providers.append(provider)
+        return provider
+
+    def get(self, name):
+        for provider in self._providers:
+            if provider.name == name:
+                return provider
+        raise KeyError(name)
+
+    def _stats_for(self, provider, group):
+        key = (provider.name, group)
+        if key not in self._stats:
+            self._stats[key] = ProviderStats(
+                window=self.window, alpha=self.alpha, error_half_life=self.error_half_life
+            )
+        return self._stats[key]
+
+    def rank(self, group, attributes):
+        candidates = [p for p in self._providers if p.can_serve(attributes)]
+        now = time.time()
+        with self._lock:
+            def sort_key(provider):
+                stats = self._stats_for(provider, group)
+                unhealthy = stats.error_rate(now) > self.error_threshold
+                cooling_down = stats.cooling_down(now)
+                primary = group in provider.primary_for
+                # Without samples, a healthy primary goes first and others go last
+                if stats.p95_ewma is not None:
+                    latency = stats.p95_ewma
+                elif primary:
+                    latency = 0
+                else:
+                    latency = float("inf")
+                return (unhealthy, cooling_down, latency, not primary)
+
+            ranked = sorted(candidates, key=sort_key)
+
+        # Occasionally try a non-leading provider so its stats stay fresh
+        if len(ranked) > 1 and random.random() < self.explore_rate:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    def _slowest_p95(self, group):
+        known = [
+            stats.p95_ewma for (_, g), stats in self._stats.items()
+            if g == group and stats.p95_ewma is not None
+        ]
+        return max(known, default=0)
+
+    def route(self, group, attributes, request):
+        """
+        Run the attribute group on the best provider, falling back in rank order.
+        Returns (provider, attributes_dict, attempts) where attempts lists
+        {"provider", "latency_ms", "ok"} for every call made; provider is None
+        with an empty result if every candidate failed.
+        """
+        ranked = self.rank(group, attributes)
+        if not ranked:
+            raise ValueError(f"No provider can serve group {group}: {attributes}")
+
+        attempts = []
+        for provider in ranked:
+            start = time.time()
+            try:
+                result = provider.run(attributes, request)
+                if not result:
+                    raise ValueError("empty result")
+            except Exception:
+                logging.exception(f"{provider.name} failed for {group}")
+                attempt_ms = round((time.time() - start) * 1000, 2)
+                attempts.append({"provider": provider.name, "latency_ms": attempt_ms, "ok": False})
+                with self._lock:
+                    floor_ms = self._slowest_p95(group)
+                    self._stats_for(provider, group).record_failure(attempt_ms, floor_ms)
+                continue
+
+            attempt_ms = round((time.time() - start) * 1000, 2)
+            attempts.append({"provider": provider.name, "latency_ms": attempt_ms, "ok": True})
+            with self._lock:
+                self._stats_for(provider, group).record_success(attempt_ms)
+            logging.info(f"Routed {group} to {provider.name} in {attempt_ms} ms")
+            return provider, result, attempts
+
+        logging.error(f"All providers failed for {group}")
+        return None, {}, attempts
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                f"{name}/{group}": stats.snapshot()
+                for (name, group), stats in self._stats.items()
+            }
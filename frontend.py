@@ -1,7 +1,6 @@
 import streamlit as st
-import requests
-import json
-import time
+import httpx
+from Client import AnalyzeClient, AnalyzeError, AnalysisFailed
 
 # Configure Streamlit page
 st.set_page_config(
@@ -17,26 +16,26 @@ st.markdown("Upload 4 image URLs of the same clothing item to get detailed analy
 # API configuration
 API_BASE_URL = "https://minimal-multi-model-service-712257844272.us-south1.run.app"  # Change this to your FastAPI server URL
 
+@st.cache_resource
+def get_client():
+    """Shared API client so connections are kept alive across Streamlit reruns"""
+    return AnalyzeClient(API_BASE_URL, timeout=60)
+
 def call_analysis_api(urls_text):
     """Call the FastAPI analysis endpoint"""
     try:
-        payload = {"query": urls_text}
-        response = requests.post(
-            f"{API_BASE_URL}/v1/items/analyze",
-            json=payload,
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            return json.loads(response.text)
-        else:
-            st.error(f"API Error: {response.status_code} - {response.text}")
-            return None
-            
-    except requests.exceptions.ConnectionError:
+        return get_client().analyze(urls_text)
+
+    except AnalysisFailed as e:
+        st.error(f"❌ Analysis failed: {e.message}")
+        return None
+    except AnalyzeError as e:
+        st.error(f"API Error: {e.status_code} - {e.message}")
+        return None
+    except httpx.ConnectError:
         st.error("❌ Cannot connect to API server. Make sure your FastAPI server is running on http://localhost:8000")
         return None
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         st.error("⏰ Request timed out. The analysis is taking too long.")
         return None
     except Exception as e:
@@ -77,26 +76,14 @@ def display_model_info(model_info, processing):
     total_time = processing.get('total_latency_ms', 0)
     st.metric("Total Processing Time", f"{total_time} ms")
     
-    # Model breakdown
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("**Gemini 2.5 Flash**")
-        gemini_time = processing.get('per_model_latency', {}).get('gemini', 0)
-        st.write(f"⏱️ {gemini_time} ms")
-        st.write("📝 Category, Brand, Material, etc.")
-    
-    with col2:
-        st.markdown("**Google Cloud Vision**")
-        cloud_time = processing.get('per_model_latency', {}).get('cloud', 0)
-        st.write(f"⏱️ {cloud_time} ms")
-        st.write("🎨 Color Detection")
-    
-    with col3:
-        st.markdown("**LLaMA Vision**")
-        llama_time = processing.get('per_model_latency', {}).get('llama', 0)
-        st.write(f"⏱️ {llama_time} ms")
-        st.write("👕 Sleeve, Neckline, Closure")
+    # Model breakdown (providers are routed per attribute group, so list whatever served this request)
+    columns = st.columns(max(len(model_info), 1))
+    for col, (name, info) in zip(columns, model_info.items()):
+        with col:
+            st.markdown(f"**{info.get('model', name)}**")
+            model_time = processing.get('per_model_latency', {}).get(name, info.get('latency_ms', 0))
+            st.write(f"⏱️ {model_time} ms")
+            st.write("📝 " + ", ".join(a.replace('_', ' ').title() for a in info.get('attributes', [])))
 
 def main():
     # Input section
@@ -121,24 +108,19 @@ def main():
             result = call_analysis_api(urls_input.strip())
         
         if result:
-            # Check if analysis was successful
-            if result.get('status') == 200:
-                st.success("✅ Analysis completed successfully!")
-                
-                # Display attributes
-                if 'attributes' in result:
-                    display_attributes(result['attributes'])
-                
-                # Display model performance
-                if 'model_info' in result and 'processing' in result:
-                    display_model_info(result['model_info'], result['processing'])
-                
-                # Show raw JSON in expander for debugging
-                with st.expander("🔧 Raw JSON Response"):
-                    st.json(result)
-                    
-            else:
-                st.error(f"❌ Analysis failed: {result.get('error', 'Unknown error')}")
+            st.success("✅ Analysis completed successfully!")
+            
+            # Display attributes
+            if 'attributes' in result:
+                display_attributes(result['attributes'])
+            
+            # Display model performance
+            if 'model_info' in result and 'processing' in result:
+                display_model_info(result['model_info'], result['processing'])
+            
+            # Show raw JSON in expander for debugging
+            with st.expander("🔧 Raw JSON Response"):
+                st.json(result)
         
     # Instructions section
     st.sidebar.header("📖 Instructions")
@@ -164,12 +146,14 @@ def main():
     st.sidebar.header("🔗 API Status")
     if st.sidebar.button("Check API Connection"):
         try:
-            response = requests.get(f"{API_BASE_URL}/docs", timeout=5)
-            if response.status_code == 200:
+            status = get_client().status(timeout=5)
+            if status.get("status") == "ok":
                 st.sidebar.success("✅ API is running")
             else:
                 st.sidebar.error("❌ API returned error")
-        except:
+        except httpx.HTTPStatusError:
+            st.sidebar.error("❌ API returned error")
+        except Exception:
             st.sidebar.error("❌ Cannot connect to API")
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+import asyncio
+
+from Admission import AdmissionController
+
+
+def make_controller(max_active=2, max_bytes=100, max_queued=1, queue_timeout=0.2):
+    return AdmissionController(
+        max_active=max_active,
+        max_bytes=max_bytes,
+        max_queued=max_queued,
+        queue_timeout=queue_timeout,
+    )
+
+
+def test_admits_until_slots_are_full():
+    async def scenario():
+        admission = make_controller()
+        assert await admission.acquire(10) is None
+        assert await admission.acquire(10) is None
+        assert admission.active == 2
+        assert admission.inflight_bytes == 20
+
+    asyncio.run(scenario())
+
+
+def test_rejects_with_429_when_queue_is_full():
+    async def scenario():
+        admission = make_controller(max_active=1, queue_timeout=5)
+        assert await admission.acquire(10) is None
+        waiter = asyncio.create_task(admission.acquire(10))
+        await asyncio.sleep(0.01)
+
+        assert admission.queued == 1
+        assert await admission.acquire(10) == 429
+        assert admission.rejected == 1
+
+        await admission.release(10)
+        assert await waiter is None
+
+    asyncio.run(scenario())
+
+
+def test_returns_503_when_queue_wait_times_out():
+    async def scenario():
+        admission = make_controller(max_active=1, queue_timeout=0.05)
+        assert await admission.acquire(10) is None
+        assert await admission.acquire(10) == 503
+        assert admission.timed_out == 1
+        assert admission.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_byte_cap_queues_when_slots_are_free():
+    async def scenario():
+        admission = make_controller(max_active=4, max_bytes=100, queue_timeout=0.05)
+        assert await admission.acquire(70) is None
+        assert await admission.acquire(70) == 503
+        assert admission.active == 1
+
+    asyncio.run(scenario())
+
+
+def test_release_restores_counters_and_wakes_waiter():
+    async def scenario():
+        admission = make_controller(max_active=1, queue_timeout=5)
+        assert await admission.acquire(40) is None
+        waiter = asyncio.create_task(admission.acquire(30))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await admission.release(40)
+        assert await waiter is None
+        assert admission.active == 1
+        assert admission.inflight_bytes == 30
+
+        await admission.release(30)
+        assert admission.active == 0
+        assert admission.inflight_bytes == 0
+        assert admission.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_budget_is_clamped_to_pool_size():
+    async def scenario():
+        admission = make_controller(max_bytes=100)
+        assert await admission.acquire(500) is None
+        assert admission.inflight_bytes == 100
+        await admission.release(500)
+        assert admission.inflight_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_shrink_frees_bytes_for_waiters():
+    async def scenario():
+        admission = make_controller(max_active=4, max_bytes=100, queue_timeout=5)
+        assert await admission.acquire(80) is None
+        waiter = asyncio.create_task(admission.acquire(50))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await admission.shrink(80, 20)
+        assert await waiter is None
+        assert admission.inflight_bytes == 70
+
+        await admission.release(20)
+        await admission.release(50)
+        assert admission.inflight_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_newcomer_does_not_skip_queued_request():
+    async def scenario():
+        admission = make_controller(max_active=4, max_bytes=100, max_queued=2, queue_timeout=5)
+        assert await admission.acquire(60) is None
+        first = asyncio.create_task(admission.acquire(60))
+        await asyncio.sleep(0.01)
+
+        # Fits on its own, but must wait behind the queued request
+        newcomer = asyncio.create_task(admission.acquire(30))
+        await asyncio.sleep(0.01)
+        assert not newcomer.done()
+        assert admission.queued == 2
+
+        await admission.release(60)
+        assert await first is None
+        assert await newcomer is None
+
+    asyncio.run(scenario())
+
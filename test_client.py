@@ -0,0 +1,65 @@
+import time
+
+import httpx
+import pytest
+
+from Client import AnalysisFailed, AnalyzeClient, AnalyzeError, retry_delay
+
+
+def make_client(handler, **kwargs):
+    client = AnalyzeClient("http://api", **kwargs)
+    client._http = httpx.Client(base_url="http://api", transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_retry_after_gets_jitter():
+    response = httpx.Response(429, headers={"Retry-After": "4"})
+    delays = {retry_delay(response, 0, 0.5, 30) for _ in range(20)}
+    assert all(4 <= d <= 6 for d in delays)
+    assert len(delays) > 1
+
+
+def test_retries_429_then_succeeds():
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"status": 200, "attributes": {}})
+
+    assert make_client(handler).analyze(["a", "b", "c", "d"])["status"] == 200
+    assert calls["n"] == 2
+
+
+def test_body_failure_raises_analysis_failed():
+    def handler(request):
+        return httpx.Response(200, json={"status": 400, "error": "One or more images exceed 10MB or are invalid."})
+
+    with pytest.raises(AnalysisFailed) as exc:
+        make_client(handler).analyze("a b c d")
+    assert exc.value.status_code == 400
+
+
+def test_http_error_raises_analyze_error():
+    def handler(request):
+        return httpx.Response(500, text="boom")
+
+    with pytest.raises(AnalyzeError) as exc:
+        make_client(handler).analyze("a b c d")
+    assert not isinstance(exc.value, AnalysisFailed)
+
+
+def test_analyze_many_stops_queued_items_on_early_exit():
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        time.sleep(0.1)
+        return httpx.Response(200, json={"status": 200})
+
+    client = make_client(handler, max_concurrency=2)
+    for index, result in client.analyze_many([str(i) for i in range(8)]):
+        break
+    time.sleep(0.2)
+    assert calls["n"] <= 3
@@ -0,0 +1,140 @@
+import time
+
+from Registry import Provider, ProviderRegistry
+
+
+def returns(value, delay=0):
+    def run(attributes, request):
+        time.sleep(delay)
+        return {attr: value for attr in attributes}
+    return run
+
+
+def fails(attributes, request):
+    raise RuntimeError("provider down")
+
+
+def make_registry(**kwargs):
+    kwargs.setdefault("explore_rate", 0)
+    return ProviderRegistry(**kwargs)
+
+
+def names(providers):
+    return [p.name for p in providers]
+
+
+def test_cold_start_prefers_primary():
+    registry = make_registry()
+    registry.register(Provider("other", "O", ["color"], returns("blue")))
+    registry.register(Provider("primary", "P", ["color"], returns("red"), primary_for=["color"]))
+
+    assert names(registry.rank("color", ["color"])) == ["primary", "other"]
+    provider, result, attempts = registry.route("color", ["color"], {})
+    assert provider.name == "primary"
+    assert result == {"color": "red"}
+    assert [a["provider"] for a in attempts] == ["primary"]
+
+
+def test_only_providers_that_can_serve_are_ranked():
+    registry = make_registry()
+    registry.register(Provider("cloud", "C", ["color"], returns("red")))
+    registry.register(Provider("gemini", "G", ["color", "brand"], returns("x")))
+
+    assert names(registry.rank("semantic", ["brand"])) == ["gemini"]
+
+
+def test_traffic_shifts_to_faster_provider():
+    registry = make_registry()
+    registry.register(Provider("slow", "S", ["color"], returns("red", 0.03), primary_for=["color"]))
+    registry.register(Provider("fast", "F", ["color"], returns("blue", 0.001)))
+
+    registry.route("color", ["color"], {})
+    registry._stats_for(registry.get("fast"), "color").record_success(1)
+
+    assert names(registry.rank("color", ["color"])) == ["fast", "slow"]
+
+
+def test_fallback_in_rank_order_and_per_attempt_latency():
+    registry = make_registry()
+    registry.register(Provider("primary", "P", ["color"], fails, primary_for=["color"]))
+    registry.register(Provider("backup", "B", ["color"], returns("blue")))
+
+    provider, result, attempts = registry.route("color", ["color"], {})
+    assert provider.name == "backup"
+    assert result == {"color": "blue"}
+    assert [(a["provider"], a["ok"]) for a in attempts] == [("primary", False), ("backup", True)]
+    assert all(a["latency_ms"] >= 0 for a in attempts)
+
+
+def test_all_providers_failing_reports_no_provider():
+    registry = make_registry()
+    registry.register(Provider("a", "A", ["color"], fails))
+    registry.register(Provider("b", "B", ["color"], lambda attributes, request: {}))
+
+    provider, result, attempts = registry.route("color", ["color"], {})
+    assert provider is None
+    assert result == {}
+    assert len(attempts) == 2
+
+
+def test_failed_primary_cools_down_then_returns():
+    registry = make_registry(error_half_life=0.05)
+    calls = {"n": 0}
+
+    def flaky(attributes, request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("transient")
+        return {"color": "red"}
+
+    registry.register(Provider("backup", "B", ["color"], returns("blue", 0.02)))
+    registry.register(Provider("primary", "P", ["color"], flaky, primary_for=["color"]))
+
+    assert registry.route("color", ["color"], {})[0].name == "backup"
+    assert names(registry.rank("color", ["color"])) == ["backup", "primary"]
+
+    time.sleep(0.1)
+    assert names(registry.rank("color", ["color"]))[0] == "primary"
+    assert registry.route("color", ["color"], {})[0].name == "primary"
+
+
+def test_unhealthy_provider_recovers_as_errors_decay():
+    registry = make_registry(error_half_life=0.05)
+    registry.register(Provider("backup", "B", ["color"], returns("blue")))
+    primary = registry.register(Provider("primary", "P", ["color"], fails, primary_for=["color"]))
+
+    stats = registry._stats_for(primary, "color")
+    for _ in range(3):
+        stats.record_failure(10)
+    assert stats.error_rate() > registry.error_threshold
+    assert names(registry.rank("color", ["color"])) == ["backup", "primary"]
+
+    time.sleep(0.3)
+    assert stats.error_rate() < registry.error_threshold
+    assert not stats.cooling_down()
+
+
+def test_fast_failure_does_not_look_fast():
+    registry = make_registry(error_half_life=0.05)
+    registry.register(Provider("primary", "P", ["color"], returns("red"), primary_for=["color"]))
+    explored = registry.register(Provider("explored", "E", ["color"], fails))
+
+    registry._stats_for(registry.get("primary"), "color").record_success(500)
+
+    # Exploration sends one request to the other provider, which fails quickly
+    registry.explore_rate = 1
+    assert registry.route("color", ["color"], {})[0].name == "primary"
+    assert registry._stats_for(explored, "color").p95_ewma >= 500
+
+    # Even once the cooldown is over, the failed provider is not ranked ahead
+    registry.explore_rate = 0
+    time.sleep(0.1)
+    assert names(registry.rank("color", ["color"])) == ["primary", "explored"]
+
+
+def test_exploration_moves_another_provider_first():
+    registry = make_registry(explore_rate=1)
+    registry.register(Provider("primary", "P", ["color"], returns("red"), primary_for=["color"]))
+    registry.register(Provider("other", "O", ["color"], returns("blue")))
+
+    assert names(registry.rank("color", ["color"])) == ["other", "primary"]